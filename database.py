@@ -5,9 +5,11 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
 import os
+import logging
 from dotenv import load_dotenv
 from typing import Union
 from pydantic import BaseModel
@@ -15,6 +17,8 @@ from pydantic import BaseModel
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 _client = None
 db = None
 
@@ -22,11 +26,68 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    _client = AsyncIOMotorClient(database_url)
     db = _client[database_name]
 
+class PartialInsertError(Exception):
+    """Raised by create_documents when only some of the documents were written"""
+
+    def __init__(self, inserted_ids: list, failed_indexes: list):
+        super().__init__(f"{len(failed_indexes)} of {len(inserted_ids) + len(failed_indexes)} documents failed to insert")
+        self.inserted_ids = inserted_ids
+        self.failed_indexes = failed_indexes
+
+
+_indexes_ready = False
+
+
+async def ensure_indexes():
+    """Create the indexes used by the ticket and comment queries (once per process)"""
+    global _indexes_ready
+    if db is None or _indexes_ready:
+        return
+
+    # A missing index only costs performance, so never let it block startup; the indexes stay
+    # missing until the next restart
+    try:
+        await db["ticket"].create_index([("status", 1), ("priority", 1), ("_id", -1)], background=True)
+        # priority-only filters can't use the status-prefixed index above
+        await db["ticket"].create_index([("priority", 1), ("_id", -1)], background=True)
+        await db["comment"].create_index([("ticket_id", 1), ("_id", 1)], background=True)
+    except Exception:
+        logger.exception("Could not create database indexes; queries run unindexed until the next restart")
+        return
+    _indexes_ready = True
+
+_comment_ids_migrated = False
+
+
+async def migrate_comment_ticket_ids():
+    """Convert comment ticket_id values stored as hex strings to ObjectIds (idempotent)"""
+    global _comment_ids_migrated
+    if db is None or _comment_ids_migrated:
+        return
+
+    # Strings that aren't valid ObjectIds are left as they are rather than failing the whole update
+    try:
+        result = await db["comment"].update_many(
+            {"ticket_id": {"$type": "string"}},
+            [{"$set": {"ticket_id": {
+                "$convert": {"input": "$ticket_id", "to": "objectId", "onError": "$ticket_id"}
+            }}}],
+        )
+    except Exception:
+        logger.exception(
+            "Could not migrate comment ticket_id values to ObjectId; comments with a string ticket_id "
+            "stay hidden from ticket and comment listings until the next restart"
+        )
+        return
+    if result.modified_count:
+        logger.info("Converted ticket_id to ObjectId on %d comments", result.modified_count)
+    _comment_ids_migrated = True
+
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -37,19 +98,42 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     else:
         data_dict = data.copy()
 
-    data_dict['created_at'] = datetime.now(timezone.utc)
-    data_dict['updated_at'] = datetime.now(timezone.utc)
+    data_dict['created_at'] = data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def create_documents(collection_name: str, items: list):
+    """Insert many documents in one round-trip, sharing a single timestamp"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    docs = [
+        {**(item.model_dump() if isinstance(item, BaseModel) else item), 'created_at': now, 'updated_at': now}
+        for item in items
+    ]
+
+    try:
+        result = await db[collection_name].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # insert_many assigns _id client-side, so the survivors are every doc without a write error
+        failed = sorted({err["index"] for err in e.details.get("writeErrors", [])})
+        failed_set = set(failed)
+        inserted = [str(doc["_id"]) for i, doc in enumerate(docs) if i not in failed_set]
+        raise PartialInsertError(inserted, failed) from e
+    return [str(_id) for _id in result.inserted_ids]
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None, sort: list = None):
+    """Get documents from collection, optionally restricted to the projected fields"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
+    cursor = db[collection_name].find(filter_dict or {}, projection)
+    if sort:
+        cursor = cursor.sort(sort)
     if limit:
-        cursor = cursor.limit(limit)
+        # Fetch the whole page in one batch rather than the default 101-document first batch + getMore
+        cursor = cursor.limit(limit).batch_size(limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=limit)
@@ -1,38 +1,131 @@
 import os
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from fastapi import Body, Depends, FastAPI, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
 
-from database import db, create_document, get_documents
-from schemas import Ticket, TicketUpdate, Comment
+from database import (
+    db,
+    create_document,
+    create_documents,
+    get_documents,
+    ensure_indexes,
+    migrate_comment_ticket_ids,
+    PartialInsertError,
+)
+from schemas import Ticket, TicketUpdate, Comment, CommentBatchItem, CommentOut, TicketOut, TicketWithComments
+from middleware import StaticCORSMiddleware
 
-app = FastAPI(title="IT Ticketing System API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await migrate_comment_ticket_ids()
+    await ensure_indexes()
+    yield
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+
+app = FastAPI(title="IT Ticketing System API", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Fields returned to clients; passed to Mongo so unused fields never leave the server
+TICKET_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "requester_email": 1,
+    "category": 1,
+    "priority": 1,
+    "status": 1,
+    "assignee": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+COMMENT_PROJECTION = {
+    "ticket_id": 1,
+    "author": 1,
+    "body": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+# Request-invariant query pieces, built once at import time
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NEWEST_FIRST = [("_id", -1)]
+OLDEST_FIRST = [("_id", 1)]
+COMMENTS_LOOKUP = {"$lookup": {
+    "from": "comment",
+    "localField": "_id",
+    "foreignField": "ticket_id",
+    "pipeline": [
+        {"$sort": {"_id": 1}},
+        {"$project": COMMENT_PROJECTION},
+    ],
+    "as": "comments",
+}}
+COMMENT_COUNT_STAGES = [
+    {"$lookup": {
+        "from": "comment",
+        "localField": "_id",
+        "foreignField": "ticket_id",
+        "pipeline": [{"$count": "n"}],
+        "as": "c",
+    }},
+    {"$addFields": {"comment_count": {"$ifNull": [{"$arrayElemAt": ["$c.n", 0]}, 0]}}},
+    {"$project": {"c": 0}},
+]
+
+app.add_middleware(StaticCORSMiddleware)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_oid(value: str, detail: str) -> ObjectId:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail=detail)
+
+
+async def ticket_oid(ticket_id: str) -> ObjectId:
+    """Dependency that validates the {ticket_id} path parameter once per request"""
+    return _parse_oid(ticket_id, "Invalid ticket id")
+
+
+def _cursor_oid(cursor: str) -> ObjectId:
+    """Parse a pagination cursor (the last _id of the previous page)"""
+    return _parse_oid(cursor, "Invalid cursor")
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "IT Ticketing System API is running"}
 
 
+# Health checks get polled hard by load balancers; reuse the last result for a few seconds
+HEALTH_CACHE_SECONDS = 5
+_last_check: tuple = (0.0, {})
+
+
 @app.get("/test")
-def test_database():
+async def test_database():
+    global _last_check
+    checked_at, cached = _last_check
+    if cached and time.monotonic() - checked_at < HEALTH_CACHE_SECONDS:
+        return cached
+
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
         "database_url": None,
         "database_name": None,
         "connection_status": "Not Connected",
-        "collections": []
+        # Kept for response compatibility; ping doesn't enumerate collections
+        "collections": [],
     }
 
     try:
@@ -42,8 +135,7 @@ def test_database():
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
-                response["collections"] = collections[:10]
+                await db.command("ping")
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
                 response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
@@ -52,78 +144,78 @@ def test_database():
     except Exception as e:
         response["database"] = f"❌ Error: {str(e)[:50]}"
 
+    _last_check = (time.monotonic(), response)
     return response
 
 
-# Helper to convert ObjectId to string
-class TicketOut(BaseModel):
-    id: str
-    title: str
-    description: str
-    requester_email: str
-    category: str
-    priority: str
-    status: str
-    assignee: Optional[str] = None
-    created_at: str
-    updated_at: str
-
-
 @app.post("/api/tickets", response_model=dict)
-def create_ticket(payload: Ticket):
+async def create_ticket(payload: Ticket):
     try:
-        ticket_id = create_document("ticket", payload)
+        ticket_id = await create_document("ticket", payload)
         return {"id": ticket_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/tickets", response_model=List[dict])
-def list_tickets(status: Optional[str] = None, priority: Optional[str] = None):
+@app.get("/api/tickets", response_model=List[TicketOut], response_model_exclude_unset=True)
+async def list_tickets(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_counts: bool = False,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     try:
         filter_dict = {}
         if status:
             filter_dict["status"] = status
         if priority:
             filter_dict["priority"] = priority
+        # Keyset pagination: newest first, resuming below the last _id the client saw
+        if cursor:
+            filter_dict["_id"] = {"$lt": _cursor_oid(cursor)}
+
+        # Optional comma-separated subset of ticket fields, e.g. ?fields=title,status
+        projection = TICKET_PROJECTION
+        if fields:
+            projection = {f: 1 for f in (f.strip() for f in fields.split(",")) if f in TICKET_PROJECTION}
+            if not projection:
+                raise HTTPException(status_code=400, detail="No valid fields requested")
+
+        if include_counts:
+            # Comment counts for every ticket in one aggregation instead of a query per ticket
+            pipeline = [
+                {"$match": filter_dict},
+                {"$sort": {"_id": -1}},
+                {"$limit": limit},
+                {"$project": projection},
+                *COMMENT_COUNT_STAGES,
+            ]
+            return await db["ticket"].aggregate(pipeline).to_list(length=None)
 
-        docs = get_documents("ticket", filter_dict=filter_dict)
-        result = []
-        for d in docs:
-            d["id"] = str(d.pop("_id"))
-            # Convert datetimes to isoformat strings for JSON
-            if "created_at" in d and hasattr(d["created_at"], "isoformat"):
-                d["created_at"] = d["created_at"].isoformat()
-            if "updated_at" in d and hasattr(d["updated_at"], "isoformat"):
-                d["updated_at"] = d["updated_at"].isoformat()
-            result.append(d)
-        return result
+        return await get_documents(
+            "ticket", filter_dict=filter_dict, limit=limit, projection=projection, sort=NEWEST_FIRST
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/tickets/{ticket_id}", response_model=dict)
-def get_ticket(ticket_id: str):
-    from pymongo import ReturnDocument
+@app.get("/api/tickets/{ticket_id}", response_model=TicketWithComments)
+async def get_ticket(oid: ObjectId = Depends(ticket_oid)):
     try:
-        doc = db["ticket"].find_one({"_id": ObjectId(ticket_id)})
-        if not doc:
+        # Ticket and its comments in a single round-trip
+        pipeline = [
+            {"$match": {"_id": oid}},
+            {"$project": TICKET_PROJECTION},
+            COMMENTS_LOOKUP,
+        ]
+        docs = await db["ticket"].aggregate(pipeline).to_list(length=1)
+        if not docs:
             raise HTTPException(status_code=404, detail="Ticket not found")
-        doc["id"] = str(doc.pop("_id"))
-        if "created_at" in doc and hasattr(doc["created_at"], "isoformat"):
-            doc["created_at"] = doc["created_at"].isoformat()
-        if "updated_at" in doc and hasattr(doc["updated_at"], "isoformat"):
-            doc["updated_at"] = doc["updated_at"].isoformat()
-        # fetch comments
-        comments = list(db["comment"].find({"ticket_id": ticket_id}).sort("created_at", 1))
-        for c in comments:
-            c["id"] = str(c.pop("_id"))
-            if "created_at" in c and hasattr(c["created_at"], "isoformat"):
-                c["created_at"] = c["created_at"].isoformat()
-            if "updated_at" in c and hasattr(c["updated_at"], "isoformat"):
-                c["updated_at"] = c["updated_at"].isoformat()
-        doc["comments"] = comments
-        return doc
+        return docs[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -131,26 +223,22 @@ def get_ticket(ticket_id: str):
 
 
 @app.patch("/api/tickets/{ticket_id}", response_model=dict)
-def update_ticket(ticket_id: str, updates: TicketUpdate):
-    from datetime import datetime, timezone
+async def update_ticket(updates: TicketUpdate, oid: ObjectId = Depends(ticket_oid)):
     try:
         to_set = {k: v for k, v in updates.model_dump(exclude_unset=True).items()}
         if not to_set:
-            return {"id": ticket_id, "updated": False}
-        to_set["updated_at"] = datetime.now(timezone.utc)
-        result = db["ticket"].find_one_and_update(
-            {"_id": ObjectId(ticket_id)},
+            return {"id": str(oid), "updated": False}
+        to_set["updated_at"] = _utcnow()
+        result = await db["ticket"].find_one_and_update(
+            {"_id": oid},
             {"$set": to_set},
-            return_document=True
+            projection=TICKET_PROJECTION,
+            return_document=ReturnDocument.AFTER,
         )
         if not result:
             raise HTTPException(status_code=404, detail="Ticket not found")
-        result["id"] = str(result.pop("_id"))
-        # convert dates
-        for key in ("created_at", "updated_at"):
-            if key in result and hasattr(result[key], "isoformat"):
-                result[key] = result[key].isoformat()
-        return result
+        # exclude_unset keeps list-only fields such as comment_count out of the PATCH response
+        return TicketOut.model_validate(result).model_dump(mode="json", exclude_unset=True)
     except HTTPException:
         raise
     except Exception as e:
@@ -158,12 +246,13 @@ def update_ticket(ticket_id: str, updates: TicketUpdate):
 
 
 @app.post("/api/tickets/{ticket_id}/comments", response_model=dict)
-def add_comment(ticket_id: str, payload: Comment):
+async def add_comment(payload: Comment, oid: ObjectId = Depends(ticket_oid)):
     try:
         # Ensure referenced ticket exists
-        if not db["ticket"].find_one({"_id": ObjectId(ticket_id)}):
+        if not await db["ticket"].find_one({"_id": oid}, {"_id": 1}):
             raise HTTPException(status_code=404, detail="Ticket not found")
-        comment_id = create_document("comment", {**payload.model_dump(), "ticket_id": ticket_id})
+        # payload is already validated; pass its fields rather than re-dumping the model
+        comment_id = await create_document("comment", {**payload.__dict__, "ticket_id": oid})
         return {"id": comment_id}
     except HTTPException:
         raise
@@ -171,17 +260,48 @@ def add_comment(ticket_id: str, payload: Comment):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/tickets/{ticket_id}/comments", response_model=List[dict])
-def list_comments(ticket_id: str):
+@app.post("/api/tickets/{ticket_id}/comments:batch", response_model=dict)
+async def add_comments(
+    payload: List[CommentBatchItem] = Body(..., max_length=MAX_PAGE_SIZE),
+    oid: ObjectId = Depends(ticket_oid),
+):
     try:
-        comments = get_documents("comment", {"ticket_id": ticket_id})
-        for c in comments:
-            c["id"] = str(c.pop("_id"))
-            if "created_at" in c and hasattr(c["created_at"], "isoformat"):
-                c["created_at"] = c["created_at"].isoformat()
-            if "updated_at" in c and hasattr(c["updated_at"], "isoformat"):
-                c["updated_at"] = c["updated_at"].isoformat()
-        return comments
+        # One existence check and one insert_many for the whole batch
+        if not await db["ticket"].find_one({"_id": oid}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        if not payload:
+            return {"ids": []}
+        comment_ids = await create_documents(
+            "comment", [{**c.__dict__, "ticket_id": oid} for c in payload]
+        )
+        return {"ids": comment_ids}
+    except HTTPException:
+        raise
+    except PartialInsertError as e:
+        raise HTTPException(
+            status_code=500,
+            detail={"message": str(e), "ids": e.inserted_ids, "failed_indexes": e.failed_indexes},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/tickets/{ticket_id}/comments", response_model=List[CommentOut])
+async def list_comments(
+    oid: ObjectId = Depends(ticket_oid),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    try:
+        # Keyset pagination: oldest first, resuming above the last _id the client saw
+        filter_dict = {"ticket_id": oid}
+        if cursor:
+            filter_dict["_id"] = {"$gt": _cursor_oid(cursor)}
+        return await get_documents(
+            "comment", filter_dict, limit=limit, projection=COMMENT_PROJECTION, sort=OLDEST_FIRST
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -189,4 +309,7 @@ def list_comments(ticket_id: str):
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+    # Import string (not the app object) so each worker process can load the app itself;
+    # "auto" picks uvloop/httptools whenever they are installed
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers, loop="auto", http="auto")
@@ -8,19 +8,25 @@ lowercased class name.
 - Comment -> "comment"
 """
 
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List, Literal
+from pydantic import BaseModel, BeforeValidator, Field, StringConstraints
+from typing import Annotated, Optional, List, Literal
 from datetime import datetime
 
 Priority = Literal["low", "medium", "high", "urgent"]
 Status = Literal["open", "in_progress", "resolved", "closed"]
 
+# Lightweight email check compiled once by pydantic-core (no email-validator round per request)
+Email = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$", max_length=254)]
+
+# Mongo ObjectId rendered as its hex string in API responses
+ObjectIdStr = Annotated[str, BeforeValidator(str)]
+
 
 class Ticket(BaseModel):
     """Schema for support tickets (collection: ticket)"""
     title: str = Field(..., min_length=3, max_length=200, description="Short summary of the issue")
     description: str = Field(..., min_length=5, description="Detailed description of the problem")
-    requester_email: EmailStr = Field(..., description="Email of the person reporting the issue")
+    requester_email: Email = Field(..., description="Email of the person reporting the issue")
     category: str = Field(..., description="Category like Hardware, Software, Access, Network, Other")
     priority: Priority = Field("medium", description="Ticket priority")
     status: Status = Field("open", description="Current ticket status")
@@ -31,7 +37,7 @@ class TicketUpdate(BaseModel):
     """Partial updates for tickets"""
     title: Optional[str] = None
     description: Optional[str] = None
-    requester_email: Optional[EmailStr] = None
+    requester_email: Optional[Email] = None
     category: Optional[str] = None
     priority: Optional[Priority] = None
     status: Optional[Status] = None
@@ -40,21 +46,52 @@ class TicketUpdate(BaseModel):
 
 class Comment(BaseModel):
     """Schema for comments on tickets (collection: comment)"""
-    ticket_id: str = Field(..., description="ID of the ticket this comment belongs to")
+    ticket_id: str = Field(..., description="ID of the ticket this comment belongs to (stored as an ObjectId)")
     author: str = Field(..., description="Name or email of the commenter")
     body: str = Field(..., min_length=1, description="Comment text")
 
 
+class CommentBatchItem(BaseModel):
+    """One comment in a batch; the ticket comes from the request path"""
+    author: str = Field(..., description="Name or email of the commenter")
+    body: str = Field(..., min_length=1, description="Comment text")
+
+
+class CommentOut(BaseModel):
+    """Response model for a stored comment"""
+    id: ObjectIdStr = Field(..., validation_alias="_id")
+    ticket_id: ObjectIdStr
+    author: str
+    body: str
+    created_at: datetime
+    updated_at: datetime
+
+
+class TicketOut(BaseModel):
+    """Response model for a stored ticket; fields may be omitted when a projection is requested"""
+    id: ObjectIdStr = Field(..., validation_alias="_id")
+    title: Optional[str] = None
+    description: Optional[str] = None
+    requester_email: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[Priority] = None
+    status: Optional[Status] = None
+    assignee: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    comment_count: Optional[int] = None
+
+
 class TicketWithComments(BaseModel):
     """Response model for a ticket including comments"""
-    id: str
+    id: ObjectIdStr = Field(..., validation_alias="_id")
     title: str
     description: str
-    requester_email: EmailStr
+    requester_email: str
     category: str
     priority: Priority
     status: Status
     assignee: Optional[str] = None
     created_at: datetime
     updated_at: datetime
-    comments: List[dict] = []
+    comments: List[CommentOut] = []